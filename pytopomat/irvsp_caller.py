@@ -4,14 +4,16 @@ Interface to irvsp.
 """
 
 import warnings
+import io
 import os
 from os import path
 import subprocess
+from itertools import islice
 
-from monty.json import MSONable
+from monty.json import MSONable, jsanitize
 from monty.dev import requires
 from monty.os.path import which
-from monty.serialization import loadfn
+from monty.serialization import dumpfn, loadfn
 
 from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
 from pymatgen.symmetry.groups import SpaceGroup
@@ -30,6 +32,129 @@ __date__ = "August 2019"
 
 IRVSPEXE = which("irvsp")
 
+# Bump whenever the parsed layout of IRVSPOutput changes so stale
+# cached_irvsp_output caches miss
+_CACHE_VERSION = 2
+
+
+def _parse_irvsp_stream(file, kvec_filter, num_kpts=None):
+    """
+    Parse header info and irreps at each k-point from irvsp output.
+
+    Args:
+        file (file object): irvsp output, iterated line by line.
+        kvec_filter (callable): Maps a kvec tuple (rounded to 3 decimals) to
+            the key it is stored under in parity_eigenvals, or None to skip it.
+        num_kpts (int): Number of distinct keys kvec_filter can return. If
+            given, parsing stops as soon as all of them (both spins if
+            spin-polarized) have been read, so a key returned for several
+            k-points keeps its first block. Leave as None to read the whole
+            output, where a later block overwrites an earlier one.
+
+    Returns:
+        header (dict): symmorphic, inversion, soc and spin_polarized flags.
+        parity_eigenvals (dict): band index, band degeneracy, energy eigenval,
+            irreps, point group and character table at each kept k-point.
+
+    """
+
+    # Only the first 11 lines are needed for the header; the rest of the
+    # file is streamed line by line below
+    lines = list(islice(file, 11))
+
+    # Get header info
+    symm_line = lines[7]
+    soc_line = lines[9]
+    sp_line = lines[10]
+    header = {
+        "symmorphic": "Non-symmorphic" not in symm_line,
+        "inversion": "without" not in symm_line,
+        "soc": "No" not in soc_line,
+        "spin_polarized": "No" not in sp_line,
+    }
+
+    # Dicts with kvec labels as keys
+    parity_eigenvals = {}
+
+    # Start of irrep trace info
+    for line in file:
+        if "*****" in line:
+            break
+
+    kpt_wanted, trace_start = False, False
+    for line in file:
+        if line.startswith("k = "):  # New kvec
+            k_line = line.split(" = ")[1]
+            k_line = k_line.replace("-", " -")
+            k_line = k_line.split()
+            try:
+                kvec = tuple([round(float(i), 3) for i in k_line])
+            except ValueError:
+                continue
+            trim_label = kvec_filter(kvec)
+            kpt_wanted = trim_label is not None
+
+        # Header checks are skipped inside a block of traces, which only
+        # holds trace lines until the closing "*****"
+        if not trace_start:
+            if "The point group is" in line and kpt_wanted:
+                point_gp_at_k = line.split("The point group is")[1].strip()
+                pg_character_table = []
+            if "                   E" in line and kpt_wanted:
+                pg_character_table.append(line.strip())
+            if "       G" in line and kpt_wanted:
+                pg_character_table.append(line.strip())
+            if "bnd ndg" in line and kpt_wanted:
+                trace_start = True  # Start of block of traces
+                bnds, ndgs, bnd_evs, reps = [], [], [], []
+        if kpt_wanted and trace_start:
+            # Complete trace line: fixed-column band index, degeneracy and
+            # eigenval (which can run together, e.g. "  1  2-10.396155"), the
+            # traces and a single "=" before the irrep label. Blank lines,
+            # ?? or errors are skipped.
+            head, sep, irs = line.partition("=")
+            irs = irs.strip()
+            if sep and irs and "=" not in irs and "?" not in head and head[16:].strip():
+                try:
+                    bnd = int(line[:3])  # band index
+                    ndg = int(line[3:6])  # band degeneracy
+                    bnd_ev = float(line[6:16])
+                except ValueError:
+                    pass
+                else:
+                    bnds.append(bnd)
+                    ndgs.append(ndg)
+                    bnd_evs.append(bnd_ev)
+                    reps.append(irs)
+
+        if "*****" in line and kpt_wanted:  # end of block
+            kpt_wanted = False
+            trace_start = False
+            kvec_data = {
+                "band_index": np.array(bnds, dtype=np.int32),
+                "band_degeneracy": np.array(ndgs, dtype=np.int32),
+                "band_eigenval": np.array(bnd_evs, dtype=np.float64),
+                "irreducible_reps": reps,
+                "point_group": point_gp_at_k,
+                "pg_character_table": pg_character_table,
+            }
+            if header["spin_polarized"]:
+                if trim_label in parity_eigenvals:  # up spin already stored
+                    parity_eigenvals[trim_label]["down"] = kvec_data
+                else:
+                    parity_eigenvals[trim_label] = {"up": kvec_data}
+            else:
+                parity_eigenvals[trim_label] = kvec_data
+
+            # Skip the rest of the output once every wanted k-point is read
+            if num_kpts is not None and len(parity_eigenvals) >= num_kpts:
+                if not header["spin_polarized"] or all(
+                    "down" in data for data in parity_eigenvals.values()
+                ):
+                    break
+
+    return header, parity_eigenvals
+
 
 class IRVSPCaller:
     @requires(
@@ -62,23 +187,24 @@ class IRVSPCaller:
         ):
             raise FileNotFoundError()
 
-        os.chdir(folder_name)
+        # Files are addressed relative to folder_name instead of changing the
+        # process-wide working directory, so callers can run in parallel
+        def fpath_in(name):
+            return path.join(folder_name, name)
 
         # Get sg number of structure
-        s = Structure.from_file("POSCAR")
+        s = Structure.from_file(fpath_in("POSCAR"))
+        self.structure = s
         sga = SpacegroupAnalyzer(s, symprec=symprec)
         self.sg_number = set_spn if set_spn else sga.get_space_group_number()
         self.sg_name = SpaceGroup.from_int_number(self.sg_number).symbol
 
         v = 1  # version 1 of irvsp, symmorphic symmetries
 
-        # Check if symmorphic (same symm elements as corresponding point group)
-        # REF: http://kuchem.kyoto-u.ac.jp/kinso/weda/data/group/space.pdf
-        fpath = os.path.join(os.path.dirname(__file__), "symmorphic_spacegroups.json")
-        ssgs = loadfn(fpath)["ssgs"]
-
         # Remove SGOs from OUTCAR other than identity and inversion to avoid errors
 
+        # Check if symmorphic (same symm elements as corresponding point group)
+        # REF: http://kuchem.kyoto-u.ac.jp/kinso/weda/data/group/space.pdf
         # if sgn not in ssgs:  # non-symmorphic; this doesn't work!
         #     # print("spacegroup is non-symmorphic, Ci hase forced!")
         #     print("spacegroup is non-symmorphic, version-2 hase forced!")
@@ -87,23 +213,30 @@ class IRVSPCaller:
 
         # Call irvsp
         cmd_list = ["irvsp", "-sg", str(self.sg_number), "-v", str(v)]
-        with open("outir.txt", "w") as out, open("err.txt", "w") as err:
-            process = subprocess.Popen(cmd_list, stdout=out, stderr=err)
-
-        process.communicate()  # pause while irvsp is executing
-
-        self.output = None
-
-        # Process output
-        if path.isfile("outir.txt"):
-            try:
-                self.output = IRVSPOutput("outir.txt", Kpoints.from_file("KPOINTS"))
-            except Exception as er:
-                print(er)
-                self.output = IRVSPOutputAll("outir.txt")
-
-        else:
-            raise FileNotFoundError()
+        with open(fpath_in("err.txt"), "w") as err:
+            process = subprocess.run(
+                cmd_list,
+                stdout=subprocess.PIPE,
+                stderr=err,
+                universal_newlines=True,
+                cwd=folder_name,
+            )
+
+        # stdout is kept so callers can parse it again without reading
+        # outir.txt, which stays in the run directory for later inspection
+        self.stdout = process.stdout
+        self.outir = fpath_in("outir.txt")
+        with open(self.outir, "w") as out:
+            out.write(self.stdout)
+
+        # Process output straight from the captured stdout
+        try:
+            self.output = IRVSPOutput.from_stdout(
+                self.stdout, self.outir, Kpoints.from_file(fpath_in("KPOINTS"))
+            )
+        except Exception as er:
+            print(er)
+            self.output = IRVSPOutputAll.from_stdout(self.stdout, self.outir)
 
     @staticmethod
     def modify_outcar(name="OUTCAR.bkp"):
@@ -123,33 +256,28 @@ class IRVSPCaller:
         if not path.isfile("OUTCAR"):
             raise FileNotFoundError()
 
-        irot_start = -1
         num_ops = -1
         identity_op = "    1     1.000000     0.000000     1.000000     0.000000     0.000000     0.000000     0.000000     0.000000\n"
 
         inv_op = "    2    -1.000000     0.000000     1.000000     0.000000     0.000000     0.000000     0.000000     0.000000\n"
 
-        sgo_lines = []  # OUTCAR lines with superfluous SGOs
+        # OUTCAR lines [sgo_start, sgo_end) with superfluous SGOs
+        sgo_start, sgo_end = None, None
 
         # Write a temp file without the extra SGOs
-        with open("OUTCAR", "r") as f:
-            with open("temp.txt", "w") as output:
-                lines = f.readlines()
-
-                for idx, line in enumerate(lines):
-                    if "INISYM" in line:
-                        line_list = [i for i in line.strip().split(" ") if i]
-                        num_ops = int(line_list[4])
-                    if "irot" in line:  # Start of SGOs
-                        irot_start = idx
-                        sgo_lines = list(range(idx + 1, idx + num_ops + 1))
-                    if idx == irot_start + num_ops:
-                        output.write(identity_op)
-                        output.write(inv_op) 
-                        output.write("\n")
-                    if idx not in sgo_lines:
-                        output.write(line)
-
+        with open("OUTCAR", "r") as f, open("temp.txt", "w") as output:
+            for idx, line in enumerate(f):
+                if "INISYM" in line:
+                    line_list = [i for i in line.strip().split(" ") if i]
+                    num_ops = int(line_list[4])
+                if "irot" in line:  # Start of SGOs
+                    sgo_start, sgo_end = idx + 1, idx + num_ops + 1
+                if sgo_start is None or not sgo_start <= idx < sgo_end:
+                    output.write(line)
+                elif idx == sgo_end - 1:  # last SGO line
+                    output.write(identity_op)
+                    output.write(inv_op)
+                    output.write("\n")
 
         os.rename("OUTCAR", name)
         os.rename("temp.txt", "OUTCAR")
@@ -181,180 +309,128 @@ class IRVSPOutput(MSONable):
 
         """
 
-        self._irvsp_output = irvsp_output
+        with open(irvsp_output, "r") as file:
+            self._init_from_stream(file, irvsp_output, kpoints)
 
-        self.symmorphic = symmorphic
-        self.inversion = inversion
-        self.soc = soc
-        self.spin_polarized = spin_polarized
-        self.parity_eigenvals = parity_eigenvals
-        self.kpoints = kpoints
-        self._parse_stdout(irvsp_output, kpoints)
+    @classmethod
+    def from_stdout(cls, stdout, irvsp_output, kpoints):
+        """
+        Process irvsp stdout that is already in memory instead of reading
+        irvsp_output back from disk.
 
-    def _parse_stdout(self, irvsp_output, kpoints):
+        Args:
+            stdout (str): irvsp stdout.
+            irvsp_output (str): path stdout was saved to, kept for as_dict.
+            kpoints (Kpoints): KPOINTS with labeled TRIM kpts.
 
-        # try:
-            with open(irvsp_output, "r") as file:
-                lines = file.readlines()
+        """
 
-                # Get header info
-                symm_line = lines[7]
-                if "Non-symmorphic" in symm_line:
-                    symmorphic = False
-                else:
-                    symmorphic = True
+        out = cls.__new__(cls)
+        out._init_from_stream(io.StringIO(stdout), irvsp_output, kpoints)
 
-                if "without" in symm_line:
-                    inversion = False
-                else:
-                    inversion = True
+        return out
 
-                soc_line = lines[9]
-                if "No" in soc_line:
-                    soc = False
-                else:
-                    soc = True
+    def _init_from_stream(self, file, irvsp_output, kpoints):
+        # Shared by __init__ and from_stdout
+        header, parity_eigenvals = self._parse_stdout(file, kpoints)
+        self._init_from_parsed(irvsp_output, kpoints, header, parity_eigenvals)
+
+    def _init_from_parsed(self, irvsp_output, kpoints, header, parity_eigenvals):
+        # Every construction path, cached_irvsp_output included, ends here
+        self._irvsp_output = irvsp_output
+        self.kpoints = kpoints
+
+        self.symmorphic = header["symmorphic"]
+        self.inversion = header["inversion"]
+        self.soc = header["soc"]
+        self.spin_polarized = header["spin_polarized"]
+        self.parity_eigenvals = parity_eigenvals
+
+    def as_dict(self):
+        d = super().as_dict()
+        # Band data is held as numpy arrays; serialize it as plain lists
+        d["parity_eigenvals"] = jsanitize(d["parity_eigenvals"])
+        return d
+
+    @staticmethod
+    def _parse_stdout(file, kpoints):
+
+        # Map rounded kpt -> label, skipping unlabeled kpts
+        trim_lookup = {
+            tuple(round(float(i), 3) for i in kpt): label
+            for label, kpt in zip(kpoints.labels, kpoints.kpts)
+            if label and label.strip() and label != "None"
+        }
+
+        # Stop early once every label is read, unless a label is shared by
+        # several kpts; then the last of them has to win, so read it all
+        num_kpts = len(set(trim_lookup.values()))
+        if num_kpts < len(trim_lookup):
+            num_kpts = None
+
+        return _parse_irvsp_stream(file, trim_lookup.get, num_kpts=num_kpts)
+
+
+def cached_irvsp_output(irvsp_output, kpoints):
+    """
+    Build an IRVSPOutput, reusing parsed results from
+    <irvsp_output>.cache.json while the file (mtime, size), the KPOINTS
+    labels and _CACHE_VERSION are unchanged. The cache is (re)written on a
+    miss, so this only pays off when the same large output is re-read.
+
+    Args:
+        irvsp_output (txt file): output from irvsp.
+        kpoints (Kpoints): KPOINTS with labeled TRIM kpts.
+
+    Returns:
+        output (IRVSPOutput): Parsed irvsp output.
+
+    """
+
+    cache_file = irvsp_output + ".cache.json"
+    stat = os.stat(irvsp_output)
+    cache_key = {
+        "version": _CACHE_VERSION,
+        "stat": "{}-{}".format(stat.st_mtime_ns, stat.st_size),
+        "kpoints": [
+            [str(label), [round(float(i), 3) for i in kpt]]
+            for label, kpt in zip(kpoints.labels, kpoints.kpts)
+        ],
+    }
+
+    cache = None
+    if path.isfile(cache_file):
+        try:
+            cache = loadfn(cache_file)
+        except Exception:
+            pass
+
+    if isinstance(cache, dict) and cache.get("key") == cache_key:
+        output = IRVSPOutput.__new__(IRVSPOutput)
+        output._init_from_parsed(
+            irvsp_output, kpoints, cache["header"], cache["parity_eigenvals"]
+        )
+        return output
+
+    output = IRVSPOutput(irvsp_output, kpoints)
+    cache = {
+        "key": cache_key,
+        "header": {
+            "symmorphic": output.symmorphic,
+            "inversion": output.inversion,
+            "soc": output.soc,
+            "spin_polarized": output.spin_polarized,
+        },
+        "parity_eigenvals": output.parity_eigenvals,
+    }
+
+    try:
+        dumpfn(cache, cache_file)
+    except OSError as er:
+        warnings.warn("Could not write irvsp parse cache: {}".format(er))
+
+    return output
 
-                sp_line = lines[10]
-                if "No" in sp_line:
-                    spin_polarized = False
-                else:
-                    spin_polarized = True
-
-                self.symmorphic = symmorphic
-                self.inversion = inversion
-                self.soc = soc
-                self.spin_polarized = spin_polarized
-
-                # Define TRIM labels in units of primitive reciprocal vectors
-                #******
-
-                # trim_labels = ["gamma", "x", "y", "z", "s", "t", "u", "r"]
-                # trim_pts = [
-                #     (0.0, 0.0, 0.0),
-                #     (0.5, 0.0, 0.0),
-                #     (0.0, 0.5, 0.0),
-                #     (0.0, 0.0, 0.5),
-                #     (0.5, 0.5, 0.0),
-                #     (0.0, 0.5, 0.5),
-                #     (0.5, 0.0, 0.5),
-                #     (0.5, 0.5, 0.5),
-                # ]
-
-                # trim_dict = {pt: label for (pt, label) in zip(trim_pts, trim_labels)}
-                trim_dict = dict(zip(kpoints.labels, kpoints.kpts))
-                if "None" in trim_dict:
-                    trim_dict.pop("None")
-                if None in trim_dict:
-                    trim_dict.pop(None)
-                if "" in trim_dict:
-                    trim_dict.pop(None)
-                if " " in trim_dict:
-                    trim_dict.pop(None)
-
-                trim_dict = {pt: label for (pt, label) in zip([(round(pt[0], 3), round(pt[1], 3), round(pt[2], 3))
-                                                               for pt in list(trim_dict.values())], trim_dict.keys())}
-                #*******
-                # Dicts with kvec index as keys
-                parity_eigenvals = {}
-
-                # Start of irrep trace info
-                for idx, line in enumerate(lines):
-                    if "*****" in line:
-                        block_start = idx + 1
-                        break
-
-                kpt_wanted, trace_start = False, False
-                for idx, line in enumerate(lines[block_start:]):
-                    if line.startswith("k = "):  # New kvec
-                        k_line = line.split(" = ")[1]
-                        k_line = k_line.replace("-", " -")
-                        k_line = k_line.split(" ")
-                        try:
-                            k_line.remove("")
-                        except Exception:
-                            pass
-                        try:
-                            kvec = tuple([round(float(i),3) for i in k_line])
-                        except:
-                            continue
-                        if kvec not in list(trim_dict.keys()):
-                            continue
-                        trim_label = trim_dict[kvec]
-                        kpt_wanted = True
-
-                    if "The point group is" in line and kpt_wanted:
-                        point_gp_at_k = line.split("The point group is")[1].strip()
-                        pg_character_table = []
-                    if "                   E" in line and kpt_wanted:
-                        pg_character_table.append(line.strip())
-                    if "       G" in line and kpt_wanted:
-                        pg_character_table.append(line.strip())
-
-
-                    if "bnd ndg" in line and kpt_wanted:  # find inversion symmop position
-                        trace_start = True  # Start of block of traces
-                        bnds, ndgs, bnd_evs, inv_evs, reps = [], [], [], [], []
-                        line_list = line.strip().split(" ")
-                        symmops = [i for i in line_list if i]
-                        inv_num = symmops.index("E") - 3  # subtract bnd, ndg, ev
-                        num_ops = len(symmops) - 3  # subtract bnd, ndg, ev
-                    if kpt_wanted and trace_start and "0" in line:  # full trace line, not a blank line
-                        head_line = line.split()
-                        try:
-                            bdx = int(head_line[0])
-                        except:
-                            continue
-                        line_list = line[6:].strip()
-                        line_list = line_list.split("=", 1)[0]
-
-                          # delete irrep label at end of line
-                        #line_list = [i for i in line_list.split(" ") if i]
-
-                        # Check that trace line is complete, no ?? or error
-                        if len(line_list) > 30 and len(line.split("=")) == 2:  # symmops + band eigenval
-                            bnd = int(line[:3].strip())  # band index
-                            ndg = int(line[3:6].strip())  # band degeneracy
-                            bnd_ev = float(line[6:16].strip())
-                            # inv_ev = float(line[27:33].strip())
-                            irs = line.split("=")[1]
-
-                            # if not np.isclose(inv_ev%1.0, 0.0, rtol=0, atol=0.03) or \
-                            #    not np.isclose(inv_ev%1.0, 1.0, rtol=0, atol=0.03):
-                            #    warnings.warn("IRVSP output data has non-integer parity eigenvalues!")
-                            bnds.append(bnd)
-                            ndgs.append(ndg)
-                            bnd_evs.append(bnd_ev)
-                            # inv_evs.append(inv_ev)
-                            reps.append(irs)
-
-                    if "*****" in line:  # end of block
-                        kpt_start = False
-                        trace_start = False
-                        kvec_data = {
-                            "band_index": bnds,
-                            "band_degeneracy": ndgs,
-                            "band_eigenval": bnd_evs,
-                            # "inversion_eigenval": inv_evs,
-                            "irreducible_reps": reps,
-                            "point_group": point_gp_at_k,
-                            "pg_character_table": pg_character_table
-                        }
-                        if self.spin_polarized:
-                            if trim_label in parity_eigenvals.keys():
-                                parity_eigenvals[trim_label]["down"] = kvec_data
-                            else:
-                                parity_eigenvals[trim_label] = {"up": kvec_data}
-                        else:
-                            parity_eigenvals[trim_label] = kvec_data
-
-            self.parity_eigenvals = parity_eigenvals
-
-        # except Exception as er:
-        #     warnings.warn(
-        #         "irvsp output not found. Setting instance attributes from direct inputs!"
-        #     )
-        #     print(er)
 
 class IRVSPOutputAll(MSONable):
     def __init__(
@@ -381,168 +457,41 @@ class IRVSPOutputAll(MSONable):
 
         """
 
-        self._irvsp_output = irvsp_output
+        with open(irvsp_output, "r") as file:
+            self._init_from_stream(file, irvsp_output)
 
-        self.symmorphic = symmorphic
-        self.inversion = inversion
-        self.soc = soc
-        self.spin_polarized = spin_polarized
-        self.parity_eigenvals = parity_eigenvals
-        self._parse_stdout(irvsp_output)
+    @classmethod
+    def from_stdout(cls, stdout, irvsp_output):
+        """
+        Process irvsp stdout that is already in memory instead of reading
+        irvsp_output back from disk.
 
-    def _parse_stdout(self, irvsp_output):
+        Args:
+            stdout (str): irvsp stdout.
+            irvsp_output (str): path stdout was saved to, kept for as_dict.
 
-        # try:
-        with open(irvsp_output, "r") as file:
-            lines = file.readlines()
+        """
 
-            # Get header info
-            symm_line = lines[7]
-            if "Non-symmorphic" in symm_line:
-                symmorphic = False
-            else:
-                symmorphic = True
+        out = cls.__new__(cls)
+        out._init_from_stream(io.StringIO(stdout), irvsp_output)
 
-            if "without" in symm_line:
-                inversion = False
-            else:
-                inversion = True
+        return out
 
-            soc_line = lines[9]
-            if "No" in soc_line:
-                soc = False
-            else:
-                soc = True
+    def as_dict(self):
+        d = super().as_dict()
+        # Band data is held as numpy arrays; serialize it as plain lists
+        d["parity_eigenvals"] = jsanitize(d["parity_eigenvals"])
+        return d
 
-            sp_line = lines[10]
-            if "No" in sp_line:
-                spin_polarized = False
-            else:
-                spin_polarized = True
-
-            self.symmorphic = symmorphic
-            self.inversion = inversion
-            self.soc = soc
-            self.spin_polarized = spin_polarized
-
-            # Define TRIM labels in units of primitive reciprocal vectors
-            #******
-
-            # trim_labels = ["gamma", "x", "y", "z", "s", "t", "u", "r"]
-            # trim_pts = [
-            #     (0.0, 0.0, 0.0),
-            #     (0.5, 0.0, 0.0),
-            #     (0.0, 0.5, 0.0),
-            #     (0.0, 0.0, 0.5),
-            #     (0.5, 0.5, 0.0),
-            #     (0.0, 0.5, 0.5),
-            #     (0.5, 0.0, 0.5),
-            #     (0.5, 0.5, 0.5),
-            # ]
-
-            # trim_dict = {pt: label for (pt, label) in zip(trim_pts, trim_labels)}
-            # trim_dict = dict(zip(kpoints.labels, kpoints.kpts))
-            # if "None" in trim_dict:
-            #     trim_dict.pop("None")
-            # if None in trim_dict:
-            #     trim_dict.pop(None)
-            # if "" in trim_dict:
-            #     trim_dict.pop(None)
-            # if " " in trim_dict:
-            #     trim_dict.pop(None)
-            #
-            # trim_dict = {pt: label for (pt, label) in zip([(round(pt[0], 3), round(pt[1], 3), round(pt[2], 3))
-            #                                                for pt in list(trim_dict.values())], trim_dict.keys())}
-            #*******
-            # Dicts with kvec index as keys
-            parity_eigenvals = {}
-
-            # Start of irrep trace info
-            for idx, line in enumerate(lines):
-                if "*****" in line:
-                    block_start = idx + 1
-                    break
+    def _init_from_stream(self, file, irvsp_output):
+        # Shared by __init__ and from_stdout; every k-point is kept, labeled
+        # by its coordinates
+        header, parity_eigenvals = _parse_irvsp_stream(file, str)
 
-            kpt_wanted, trace_start = False, False
-            for idx, line in enumerate(lines[block_start:]):
-                if line.startswith("k = "):  # New kvec
-                    line_list = line.split(" ")[2:]
-                    try:
-                        kvec = tuple([round(float(i),3) for i in line_list])
-                    except:
-                        continue
-                    trim_label = str(kvec)
-                    kpt_wanted = True
-
-                if "The point group is" in line and kpt_wanted:
-                    point_gp_at_k = line.split("The point group is")[1].strip()
-                    pg_character_table = []
-                if "                   E" in line and kpt_wanted:
-                    pg_character_table.append(line.strip())
-                if "       G" in line and kpt_wanted:
-                    pg_character_table.append(line.strip())
-
-
-                if "bnd ndg" in line and kpt_wanted:  # find inversion symmop position
-                    trace_start = True  # Start of block of traces
-                    bnds, ndgs, bnd_evs, inv_evs, reps = [], [], [], [], []
-                    line_list = line.strip().split(" ")
-                    symmops = [i for i in line_list if i]
-                    inv_num = symmops.index("E") - 3  # subtract bnd, ndg, ev
-                    num_ops = len(symmops) - 3  # subtract bnd, ndg, ev
-                if kpt_wanted and trace_start and "0" in line:  # full trace line, not a blank line
-                    head_line = line.split()
-                    try:
-                        bdx = int(head_line[0])
-                    except:
-                        continue
-                    line_list = line[6:].strip().split("=", 1)[0]
-
-                    # delete irrep label at end of line
-                    #line_list = [i for i in line_list.split(" ") if i]
-
-                    # Check that trace line is complete, no ?? or error
-                    if len(line_list) >= 20 and len(line.split("=")) == 2:  # symmops + band eigenval
-                        bnd = int(line[:3].strip())  # band index
-                        ndg = int(line[3:6].strip())  # band degeneracy
-                        bnd_ev = float(line[6:16].strip())
-                        # inv_ev = float(line[27:33].strip())
-                        irs = line.split("=")[1]
-
-                        # if not np.isclose(inv_ev%1.0, 0.0, rtol=0, atol=0.03) or \
-                        #    not np.isclose(inv_ev%1.0, 1.0, rtol=0, atol=0.03):
-                        #    warnings.warn("IRVSP output data has non-integer parity eigenvalues!")
-
-                        bnds.append(bnd)
-                        ndgs.append(ndg)
-                        bnd_evs.append(bnd_ev)
-                        # inv_evs.append(inv_ev)
-                        reps.append(irs)
-
-                if "*****" in line:  # end of block
-                    kpt_start = False
-                    trace_start = False
-                    kvec_data = {
-                        "band_index": bnds,
-                        "band_degeneracy": ndgs,
-                        "band_eigenval": bnd_evs,
-                        # "inversion_eigenval": inv_evs,
-                        "irreducible_reps": reps,
-                        "point_group": point_gp_at_k,
-                        "pg_character_table": pg_character_table
-                    }
-                    if self.spin_polarized:
-                        if trim_label in parity_eigenvals.keys():
-                            parity_eigenvals[trim_label]["down"] = kvec_data
-                        else:
-                            parity_eigenvals[trim_label] = {"up": kvec_data}
-                    else:
-                        parity_eigenvals[trim_label] = kvec_data
+        self._irvsp_output = irvsp_output
 
+        self.symmorphic = header["symmorphic"]
+        self.inversion = header["inversion"]
+        self.soc = header["soc"]
+        self.spin_polarized = header["spin_polarized"]
         self.parity_eigenvals = parity_eigenvals
-
-    # except Exception as er:
-    #     warnings.warn(
-    #         "irvsp output not found. Setting instance attributes from direct inputs!"
-    #     )
-    #     print(er)
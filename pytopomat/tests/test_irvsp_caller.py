@@ -1,16 +1,40 @@
 import warnings
 import os
+import io
 import pytest
 
 from monty.os.path import which
+from monty.json import jsanitize
 from monty.serialization import dumpfn, loadfn
 
-from pytopomat.irvsp_caller import IRVSPCaller, IRVSPOutput
+from pymatgen.io.vasp.inputs import Kpoints
+
+import pytopomat.irvsp_caller as irvsp_caller
+from pytopomat.irvsp_caller import (
+    IRVSPCaller,
+    IRVSPOutput,
+    IRVSPOutputAll,
+    cached_irvsp_output,
+    _parse_irvsp_stream,
+)
 
 test_dir = os.path.join(os.path.dirname(__file__), "../..", "test_files")
 IRVSPEXE = which("irvsp")
 
 
+def _kpoints(kpts, labels):
+    """Returns a reciprocal-mode Kpoints with the given labels."""
+
+    return Kpoints(
+        comment="TRIM",
+        num_kpts=len(kpts),
+        style=Kpoints.supported_modes.Reciprocal,
+        kpts=kpts,
+        kpts_weights=[1] * len(kpts),
+        labels=labels,
+    )
+
+
 class TestIrvsp(object):
     @pytest.fixture
     def ic(self):
@@ -69,5 +93,201 @@ class TestIrvsp(object):
         assert spin_parity_eigenvals["gamma"]["down"]["inversion_eigenval"][0] == 1.0
 
 
+class TestIrvspParsing(object):
+    @staticmethod
+    def _outir(trace_lines, symmops="E           I"):
+        """Returns a minimal irvsp output with one k-point block."""
+
+        header = ["\n"] * 7 + [
+            " Symmorphic crystal with inversion symmetry\n",
+            " Complex eigenfunctions\n",
+            " Spin-orbit eigenfunctions (->time inversion)\n",
+            " No spin-polarization\n",
+            "*" * 80 + "\n",
+        ]
+        block = [
+            "k = 0.000000 0.000000 0.000000\n",
+            "       The point group is Ci \n",
+            "bnd ndg  eigval     {}   \n".format(symmops),
+        ]
+        return io.StringIO("".join(header + block + trace_lines + ["*" * 80 + "\n"]))
+
+    def test_trace_lines(self):
+        trace_lines = [
+            "  1  2-10.396155 2.00+0.00i  2.00+0.00i =G2+ + G2+ \n",
+            "  3  2 -9.794020 2.00+0.00i -2.00-0.00i =G2- + G2- \n",
+            "\n",
+            "  5  2 -8.861381 2.00+0.00i  ??         =?? \n",
+            "  7  2 -5.847336 2.00-0.00i -2.00-0.00i \n",
+            "  9  2 -5.009503 2.00+0.00i  2.00+0.00i =G2+ =G2+ \n",
+            " 11  2  1.157597\n",
+            " 13  2  1.445328 2.00-0.00i  2.00+0.00i =G2+ \n",
+        ]
+        _, parity_eigenvals = _parse_irvsp_stream(self._outir(trace_lines), str)
+        kvec_data = parity_eigenvals["(0.0, 0.0, 0.0)"]
+
+        assert list(kvec_data["band_index"]) == [1, 3, 13]
+        assert list(kvec_data["band_degeneracy"]) == [2, 2, 2]
+        assert list(kvec_data["band_eigenval"]) == [-10.396155, -9.794020, 1.445328]
+        assert kvec_data["irreducible_reps"] == ["G2+ + G2+", "G2- + G2-", "G2+"]
+        assert kvec_data["point_group"] == "Ci"
+
+    def test_trace_header_without_identity(self):
+        trace_lines = ["  1  2-10.396155 2.00+0.00i =G2+ + G2+ \n"]
+        _, parity_eigenvals = _parse_irvsp_stream(
+            self._outir(trace_lines, symmops="I"), str
+        )
+
+        assert list(parity_eigenvals["(0.0, 0.0, 0.0)"]["band_index"]) == [1]
+
+    def test_irreps(self):
+        out = IRVSPOutputAll(os.path.join(test_dir, "Bi2Se3_outir.txt"))
+        kvec_data = out.parity_eigenvals["(0.0, 0.0, 0.0)"]
+
+        assert len(kvec_data["band_index"]) == 32
+        assert kvec_data["band_eigenval"][0] == -10.396155
+        assert kvec_data["irreducible_reps"][:2] == ["G2+ + G2+", "G2- + G2-"]
+
+    def test_from_stdout(self):
+        fname = os.path.join(test_dir, "CrO2_outir.txt")
+        with open(fname) as file:
+            stdout = file.read()
+
+        out = IRVSPOutputAll.from_stdout(stdout, fname)
+
+        assert out.as_dict() == IRVSPOutputAll(fname).as_dict()
+
+        kpoints = _kpoints([[0.0, 0.0, 0.0], [0.0, 0.5, 0.0]], ["gamma", "x"])
+        out = IRVSPOutput.from_stdout(stdout, fname, kpoints)
+
+        assert out.as_dict() == IRVSPOutput(fname, kpoints).as_dict()
+
+    def test_unlabeled_kpoints(self):
+        kpoints = _kpoints(
+            [[0.0, 0.0, 0.0], [0.5, 0.5, 0.5], [0.0, 0.5, 0.5], [0.5, 0.0, 0.5]],
+            ["gamma", "", None, "None"],
+        )
+        out = IRVSPOutput(os.path.join(test_dir, "Bi2Se3_outir.txt"), kpoints)
+
+        assert list(out.parity_eigenvals) == ["gamma"]
+
+    def test_unlabeled_kpoint_after_labeled(self):
+        # Every kpt but the last, (0, 0, 0.5), is labeled; the labeled
+        # block before it must still be parsed in full
+        kpts = [
+            [0.0, 0.0, 0.0],
+            [0.5, 0.5, 0.5],
+            [0.0, 0.5, 0.5],
+            [0.5, 0.0, 0.5],
+            [0.5, 0.5, 0.0],
+            [0.5, 0.0, 0.0],
+            [0.0, 0.5, 0.0],
+            [0.0, 0.0, 0.5],
+        ]
+        labels = ["gamma", "t", "f", "f2", "l", "l2", "x", None]
+        fname = os.path.join(test_dir, "Bi2Se3_outir.txt")
+
+        out = IRVSPOutput(fname, _kpoints(kpts, labels)).as_dict()
+        general = IRVSPOutputAll(fname).as_dict()
+
+        assert sorted(out["parity_eigenvals"]) == sorted(labels[:-1])
+        assert out["parity_eigenvals"]["x"] == general["parity_eigenvals"]["(0.0, 0.5, 0.0)"]
+
+    @pytest.mark.parametrize("fname", ["Bi2Se3_outir.txt", "CrO2_outir.txt"])
+    def test_early_exit(self, fname):
+        trim_lookup = {
+            (0.0, 0.0, 0.0): "gamma",
+            (0.5, 0.5, 0.5): "t",
+            (0.0, 0.5, 0.0): "x",
+        }
+
+        with open(os.path.join(test_dir, fname)) as file:
+            header, early = _parse_irvsp_stream(file, trim_lookup.get, num_kpts=3)
+        with open(os.path.join(test_dir, fname)) as file:
+            full_header, full = _parse_irvsp_stream(file, trim_lookup.get)
+
+        assert header == full_header
+        assert jsanitize(early) == jsanitize(full)
+
+    def test_shared_label(self):
+        # Two kpts labeled "x": the last block in the output wins
+        kpoints = _kpoints(
+            [[0.0, 0.0, 0.0], [0.0, 0.5, 0.0], [0.0, 0.0, 0.5]], ["gamma", "x", "x"]
+        )
+        fname = os.path.join(test_dir, "Bi2Se3_outir.txt")
+
+        out = IRVSPOutput(fname, kpoints).as_dict()
+        general = IRVSPOutputAll(fname).as_dict()
+
+        assert out["parity_eigenvals"]["x"] == general["parity_eigenvals"]["(0.0, 0.0, 0.5)"]
+
+
+class TestIrvspCache(object):
+    @pytest.fixture
+    def outir(self, tmp_path):
+        """Returns a copy of Bi2Se3_outir.txt in a scratch directory."""
+
+        fname = str(tmp_path / "outir.txt")
+        with open(os.path.join(test_dir, "Bi2Se3_outir.txt")) as src:
+            with open(fname, "w") as dst:
+                dst.write(src.read())
+
+        return fname
+
+    @pytest.fixture
+    def kpoints(self):
+        return _kpoints(
+            [[0.0, 0.0, 0.0], [0.5, 0.5, 0.5], [0.0, 0.5, 0.0]], ["gamma", "t", "x"]
+        )
+
+    @staticmethod
+    def _fail_parse(monkeypatch):
+        def fail(self, *args):
+            raise AssertionError("irvsp output was re-parsed")
+
+        monkeypatch.setattr(IRVSPOutput, "_parse_stdout", fail)
+
+    def test_no_cache_without_helper(self, outir, kpoints):
+        out = IRVSPOutput(outir, kpoints)
+
+        assert not os.path.exists(outir + ".cache.json")
+        assert "use_cache" not in out.as_dict()
+
+    def test_cache_hit(self, outir, kpoints, monkeypatch):
+        parsed = cached_irvsp_output(outir, kpoints)
+        assert os.path.exists(outir + ".cache.json")
+
+        self._fail_parse(monkeypatch)
+        cached = cached_irvsp_output(outir, kpoints)
+
+        assert cached.as_dict()["parity_eigenvals"] == parsed.as_dict()["parity_eigenvals"]
+        assert cached.inversion == parsed.inversion
+
+    def test_cache_miss_on_file_change(self, outir, kpoints, monkeypatch):
+        cached_irvsp_output(outir, kpoints)
+        with open(outir, "a") as file:
+            file.write("\n")
+
+        self._fail_parse(monkeypatch)
+        with pytest.raises(AssertionError):
+            cached_irvsp_output(outir, kpoints)
+
+    def test_cache_miss_on_labels(self, outir, kpoints, monkeypatch):
+        cached_irvsp_output(outir, kpoints)
+        kpoints.labels[-1] = "y"
+
+        self._fail_parse(monkeypatch)
+        with pytest.raises(AssertionError):
+            cached_irvsp_output(outir, kpoints)
+
+    def test_cache_miss_on_version(self, outir, kpoints, monkeypatch):
+        cached_irvsp_output(outir, kpoints)
+        monkeypatch.setattr(irvsp_caller, "_CACHE_VERSION", irvsp_caller._CACHE_VERSION + 1)
+
+        self._fail_parse(monkeypatch)
+        with pytest.raises(AssertionError):
+            cached_irvsp_output(outir, kpoints)
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -44,10 +44,10 @@ class RunIRVSP(FiretaskBase):
     def run_task(self, fw_spec):
 
         wd = os.getcwd()
-        IRVSPCaller(wd)
+        irvsp_caller = IRVSPCaller(wd)
 
         try:
-            raw_struct = Structure.from_file(wd + "/POSCAR")
+            raw_struct = irvsp_caller.structure
             formula = raw_struct.composition.formula
             structure = raw_struct.as_dict()
 
@@ -59,8 +59,13 @@ class RunIRVSP(FiretaskBase):
             structure = None
             efermi = None
 
-        kpoints = Kpoints.from_file(wd + "/KPOINTS")
-        data = IRVSPOutput(wd + "/outir.txt", kpoints)
+        # IRVSPCaller already parsed irvsp stdout; it only falls back to
+        # IRVSPOutputAll when KPOINTS can't be used, so re-raise that here
+        data = irvsp_caller.output
+        if not isinstance(data, IRVSPOutput):
+            data = IRVSPOutput.from_stdout(
+                irvsp_caller.stdout, irvsp_caller.outir, Kpoints.from_file(wd + "/KPOINTS")
+            )
 
         return FWAction(
             update_spec={
@@ -81,10 +86,10 @@ class RunIRVSPAll(FiretaskBase):
     def run_task(self, fw_spec):
 
         wd = os.getcwd()
-        IRVSPCaller(wd)
+        irvsp_caller = IRVSPCaller(wd)
 
         try:
-            raw_struct = Structure.from_file(wd + "/POSCAR")
+            raw_struct = irvsp_caller.structure
             formula = raw_struct.composition.formula
             structure = raw_struct.as_dict()
 
@@ -96,11 +101,16 @@ class RunIRVSPAll(FiretaskBase):
             structure = None
             efermi = None
 
-        kpoints = Kpoints.from_file(wd + "/KPOINTS")
-        general = IRVSPOutputAll(wd + "/outir.txt")
-        high_sym_data = IRVSPOutput(wd + "/outir.txt", kpoints)
+        high_sym_data = irvsp_caller.output
+        if not isinstance(high_sym_data, IRVSPOutput):
+            high_sym_data = IRVSPOutput.from_stdout(
+                irvsp_caller.stdout, irvsp_caller.outir, Kpoints.from_file(wd + "/KPOINTS")
+            )
+        general = IRVSPOutputAll.from_stdout(irvsp_caller.stdout, irvsp_caller.outir)
         data = general.as_dict().copy()
-        data["parity_eigenvals"] = {"high_sym": high_sym_data.parity_eigenvals, "general": general.parity_eigenvals}
+        data["parity_eigenvals"] = jsanitize(
+            {"high_sym": high_sym_data.parity_eigenvals, "general": general.parity_eigenvals}
+        )
 
         return FWAction(
             update_spec={